@@ -6,6 +6,8 @@ load_dotenv(override=True)
 AZURE_AI_PROJECT_ENDPOINT = os.getenv("AZURE_AI_PROJECT_ENDPOINT")
 AZURE_AI_MODEL_DEPLOYMENT_NAME = os.getenv("AZURE_AI_MODEL_DEPLOYMENT_NAME")
 AZURE_OPENAI_API_KEY = os.getenv("AZURE_OPENAI_API_KEY")
+# Si es "false", el Router no genera el campo 'details' (completions más cortas)
+ROUTER_INCLUDE_DETAILS = os.getenv("ROUTER_INCLUDE_DETAILS", "true").lower() in ("1", "true", "yes")
 
 if not (AZURE_AI_PROJECT_ENDPOINT and AZURE_AI_MODEL_DEPLOYMENT_NAME and AZURE_OPENAI_API_KEY):
     raise RuntimeError("Faltan variables de entorno necesarias.")
\ No newline at end of file
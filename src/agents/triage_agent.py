@@ -1,51 +1,106 @@
-from typing import Any
-from pydantic import BaseModel
+from typing import Any, Optional, Type
+from pydantic import ValidationError
 from agent_framework import ChatAgent
-from src.models.request_models import RouterOutputModel
+from src.models.request_models import RouterDecisionModel, RouterOutputModel
+import json
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
+# Bloque ```json ... ``` (o ``` ... ```) que algunos modelos agregan alrededor del JSON
+_FENCED_JSON_RE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL | re.IGNORECASE)
+
+
+def extract_json_payload(text: str) -> Optional[dict]:
+    """
+    Extrae un objeto JSON de la respuesta del modelo tolerando code fences y texto
+    antes/después del objeto. Devuelve None si no encuentra un JSON válido.
+    """
+    candidates = [text.strip()]
+    fenced = _FENCED_JSON_RE.search(text)
+    if fenced:
+        candidates.append(fenced.group(1).strip())
+    start, end = text.find("{"), text.rfind("}")
+    if start != -1 and end > start:
+        candidates.append(text[start:end + 1])
+
+    for candidate in candidates:
+        try:
+            payload = json.loads(candidate)
+        except ValueError:
+            continue
+        if isinstance(payload, dict):
+            return payload
+    return None
+
+
 class RouterAgentService:
     """
     Este servicio envuelve un ChatAgent para clasificar el tipo de consulta.
-    Debería devolver un JSON/estructura conforme a RouterOutputModel.
+    Usa structured output del chat client (JSON schema derivado de RouterOutputModel,
+    con 'tipo' como enum) para que la respuesta sea siempre parseable.
+
+    Con include_details=False se pide solo 'tipo' y 'confidence' (RouterDecisionModel),
+    lo que acorta la completion en el hot path.
     """
 
-    def __init__(self, chat_agent: ChatAgent):
+    def __init__(self, chat_agent: ChatAgent, include_details: bool = True):
         self._agent = chat_agent
+        self._include_details = include_details
+        self._output_model: Type[RouterDecisionModel] = (
+            RouterOutputModel if include_details else RouterDecisionModel
+        )
+
+    def _build_prompt(self, user_input: str) -> str:
+        if self._include_details:
+            fields = "tipo (it|hr|other), confidence (0-1) y details (breve)"
+        else:
+            fields = "tipo (it|hr|other) y confidence (0-1), sin explicación"
+        return (
+            f"Clasifica el mensaje de un empleado. Responde solo con JSON con los campos: {fields}.\n\n"
+            f"Mensaje: \"{user_input}\""
+        )
+
+    def _parse(self, response: Any) -> Optional[RouterDecisionModel]:
+        """
+        Obtiene el modelo de la respuesta: primero el valor ya parseado por el
+        structured output y, si no viene, el JSON extraído del texto.
+        """
+        value = getattr(response, "value", None)
+        if isinstance(value, RouterDecisionModel):
+            return value
+
+        payload = extract_json_payload(response.text)
+        if payload is None:
+            return None
+        try:
+            return self._output_model.model_validate(payload)
+        except ValidationError as exc:
+            logger.warning("Salida del RouterAgent no cumple el schema: %s", exc)
+            return None
 
     async def classify(self, user_input: str) -> RouterOutputModel:
         """
         Ejecuta el agente para clasificar el input.
-        Pedimos al modelo que devuelva un JSON con 'tipo' y 'confidence'.
+        Devuelve siempre un RouterOutputModel ('details' es None si include_details=False).
         """
-        # Instrucciones que orienten al modelo a devolver JSON parseable
-        prompt = (
-            "Eres un clasificador. Dado un mensaje de un empleado, responde exclusivamente con JSON "
-            "con los campos: tipo (it|hr|other), confidence (0-1) y details (breve). "
-            "Ejemplo: {\"tipo\":\"it\",\"confidence\":0.95,\"details\":\"es un problema de login\"}\n\n"
-            f"Mensaje: \"{user_input}\""
+        response = await self._agent.run(
+            self._build_prompt(user_input),
+            response_format=self._output_model,
         )
+        logger.debug("RouterAgent raw response: %s", response.text)
 
-        response = await self._agent.run(prompt)
-        text = response.text.strip()
-        logger.debug("RouterAgent raw response: %s", text)
+        parsed = self._parse(response)
+        if parsed is not None:
+            return RouterOutputModel(**parsed.model_dump())
 
-        # Intentamos parsear con Pydantic
-        try:
-            # Si viene puro JSON lo parseamos
-            import json
-            payload = json.loads(text)
-            model = RouterOutputModel(**payload)
-            return model
-        except Exception as exc:
-            logger.warning("No se pudo parsear la salida del RouterAgent a JSON: %s", exc)
-            # fallback simple: heurística por palabras clave
-            low = user_input.lower()
-            tipo = "other"
-            if any(k in low for k in ["error", "login", "servidor", "pantalla", "crash", "bug"]):
-                tipo = "it"
-            elif any(k in low for k in ["vacaciones", "permiso", "sueldo", "contrato", "rrhh", "recurso humano", "beneficios"]):
-                tipo = "hr"
-            return RouterOutputModel(tipo=tipo, confidence=0.5, details="heuristic fallback")
\ No newline at end of file
+        logger.warning("No se pudo parsear la salida del RouterAgent a JSON, se usa heurística")
+        # fallback simple: heurística por palabras clave
+        low = user_input.lower()
+        tipo = "other"
+        if any(k in low for k in ["error", "login", "servidor", "pantalla", "crash", "bug"]):
+            tipo = "it"
+        elif any(k in low for k in ["vacaciones", "permiso", "sueldo", "contrato", "rrhh", "recurso humano", "beneficios"]):
+            tipo = "hr"
+        return RouterOutputModel(tipo=tipo, confidence=0.5, details="heuristic fallback")
@@ -1,7 +1,13 @@
 
 import asyncio
 import logging
-from config.config import AZURE_AI_PROJECT_ENDPOINT, AZURE_AI_MODEL_DEPLOYMENT_NAME, AZURE_OPENAI_API_KEY
+from typing import Any, Dict, List, Optional
+from config.config import (
+    AZURE_AI_PROJECT_ENDPOINT,
+    AZURE_AI_MODEL_DEPLOYMENT_NAME,
+    AZURE_OPENAI_API_KEY,
+    ROUTER_INCLUDE_DETAILS,
+)
 
 from src.services.llm_client import LLMClientWrapper
 from src.agents.triage_agent import RouterAgentService
@@ -9,6 +15,9 @@ from src.agents.it_diagnose_agent import ITDiagnoseService
 from src.agents.it_resolve_agent import ITResolveService
 from src.agents.hr_agent import HRAgentService
 from src.workflows.workflow_builder import create_support_workflow
+from src.workflows.batch_runner import BatchCheckpointRunner, request_key
+from src.workflows.worker_pool import DEFAULT_WORKERS_CHECKPOINT_DIR, configure_logging, run_worker_pool
+from src.services.job_queue import SqliteJobQueue
 
 # Import DevUI para visualización
 from agent_framework import WorkflowViz,WorkflowOutputEvent
@@ -16,6 +25,9 @@ from agent_framework.devui import serve
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_CHECKPOINT_DIR = "checkpoints"
+DEFAULT_QUEUE_DB = "jobs.db"
+
 
 async def run_test_queries_streaming(workflow, test_queries=None):
     """Ejecuta una lista de consultas usando workflow.run_stream y muestra eventos/resultado."""
@@ -71,22 +83,12 @@ async def run_test_queries_streaming(workflow, test_queries=None):
                 print(str(final_output))
 
 
-async def run_server(run_tests: bool = False, test_queries=None):
+async def create_services(llm_wrapper: LLMClientWrapper) -> Dict[str, Any]:
     """
-    Inicializa todos los servicios y agentes, construye el workflow
-    y levanta el servidor DevUI para visualización interactiva.
+    Crea los agentes con sus instrucciones y los servicios que los envuelven.
+    Retorna un diccionario con los argumentos de create_support_workflow.
     """
-    logger.info("🚀 Iniciando servidor de workflow...")
-    
-    # ========== 1. Inicializar cliente LLM ==========
-    logger.info("🔧 Configurando cliente Azure OpenAI...")
-    llm_wrapper = LLMClientWrapper(
-        endpoint=AZURE_AI_PROJECT_ENDPOINT,
-        deployment_name=AZURE_AI_MODEL_DEPLOYMENT_NAME,
-        api_key=AZURE_OPENAI_API_KEY
-    )
-    
-    # ========== 2. Crear agentes con instrucciones específicas ==========
+    # ========== 1. Crear agentes con instrucciones específicas ==========
     logger.info("🤖 Creando agentes...")
     
     # Agente clasificador (Router)
@@ -96,8 +98,11 @@ async def run_server(run_tests: bool = False, test_queries=None):
             "Analiza el mensaje del usuario y determina si es una consulta técnica (IT), "
             "de recursos humanos (HR) o de otro tipo. "
             "Responde SIEMPRE en formato JSON con los campos: "
-            "tipo (it|hr|other), confidence (0-1) y details (breve explicación). "
-            "Ejemplo: {\"tipo\":\"it\",\"confidence\":0.95,\"details\":\"problema de acceso al servidor\"}"
+            + (
+                "tipo (it|hr|other), confidence (0-1) y details (breve explicación)."
+                if ROUTER_INCLUDE_DETAILS
+                else "tipo (it|hr|other) y confidence (0-1), sin explicación."
+            )
         ),
         name="RouterAgent"
     )
@@ -135,27 +140,53 @@ async def run_server(run_tests: bool = False, test_queries=None):
         name="HRAgent"
     )
     
-    # ========== 3. Crear servicios que envuelven los agentes ==========
+    # ========== 2. Crear servicios que envuelven los agentes ==========
     logger.info("⚙️ Inicializando servicios...")
     
-    router_service = RouterAgentService(router_agent)
-    it_diagnose_service = ITDiagnoseService(it_diagnose_agent)
-    it_resolve_service = ITResolveService(it_resolve_agent)
-    hr_service = HRAgentService(hr_agent)
+    return {
+        "router_service": RouterAgentService(router_agent, include_details=ROUTER_INCLUDE_DETAILS),
+        "it_diagnose_service": ITDiagnoseService(it_diagnose_agent),
+        "it_resolve_service": ITResolveService(it_resolve_agent),
+        "hr_service": HRAgentService(hr_agent),
+    }
+
+
+def create_llm_wrapper() -> LLMClientWrapper:
+    """Construye el cliente Azure OpenAI a partir de la configuración."""
+    logger.info("🔧 Configurando cliente Azure OpenAI...")
+    return LLMClientWrapper(
+        endpoint=AZURE_AI_PROJECT_ENDPOINT,
+        deployment_name=AZURE_AI_MODEL_DEPLOYMENT_NAME,
+        api_key=AZURE_OPENAI_API_KEY
+    )
+
+
+async def create_worker_services() -> Dict[str, Any]:
+    """Cada proceso worker crea su propio cliente LLM y sus servicios."""
+    return await create_services(create_llm_wrapper())
+
+
+async def run_server(run_tests: bool = False, test_queries=None):
+    """
+    Inicializa todos los servicios y agentes, construye el workflow
+    y levanta el servidor DevUI para visualización interactiva.
+    """
+    logger.info("🚀 Iniciando servidor de workflow...")
+    
+    # ========== 1. Inicializar cliente LLM ==========
+    llm_wrapper = create_llm_wrapper()
     
-    # ========== 4. Construir el workflow completo ==========
+    # ========== 2. Crear agentes y servicios ==========
+    services = await create_services(llm_wrapper)
+    
+    # ========== 3. Construir el workflow completo ==========
     logger.info("🏗️ Construyendo workflow con branching logic...")
     
-    workflow = create_support_workflow(
-        router_service=router_service,
-        it_diagnose_service=it_diagnose_service,
-        it_resolve_service=it_resolve_service,
-        hr_service=hr_service
-    )
+    workflow = create_support_workflow(**services)
     
     logger.info("✅ Workflow construido exitosamente")
     
-    # ========== 5. Levantar DevUI server para visualización ==========
+    # ========== 4. Levantar DevUI server para visualización ==========
     logger.info("🌐 Levantando servidor DevUI...")
     logger.info("📊 Podrás visualizar y testear el workflow en el navegador")
     # Si run_tests está activado, ejecutamos los tests en streaming y salimos
@@ -167,14 +198,112 @@ async def run_server(run_tests: bool = False, test_queries=None):
     return workflow
 
 
+async def run_batch(
+    queries: List[str],
+    checkpoint_dir: str = DEFAULT_CHECKPOINT_DIR,
+    allow_restart: bool = False,
+):
+    """
+    Procesa un lote de consultas con checkpoints en disco.
+    Si el proceso se corta, relanzar el mismo batch omite las consultas terminadas
+    y reanuda las que quedaron a medias (p. ej. una cadena IT ya diagnosticada).
+    Con allow_restart, las consultas cuyos checkpoints no permiten recuperar la salida
+    se re-ejecutan desde el inicio en lugar de fallar.
+    """
+    logger.info(f"📦 Iniciando batch con checkpoints en: {checkpoint_dir}")
+    
+    llm_wrapper = create_llm_wrapper()
+    services = await create_services(llm_wrapper)
+    
+    runner = BatchCheckpointRunner(
+        workflow_factory=lambda storage: create_support_workflow(**services, checkpoint_storage=storage),
+        checkpoint_dir=checkpoint_dir,
+        allow_restart=allow_restart,
+    )
+    results = await runner.run_batch(queries)
+    
+    for key, output in results.items():
+        print(f"\n--- [{key}] ---")
+        print(output)
+    # Solo las fallas de este batch: el registro puede tener claves de corridas anteriores
+    failures = {
+        key: runner.failures[key]
+        for key in (request_key(q) for q in queries)
+        if key in runner.failures
+    }
+    if failures:
+        print(f"\n{len(failures)} consultas fallidas (se reintentan al relanzar el batch):")
+        for key, error in failures.items():
+            print(f"  [{key}] {error}")
+    return results
+
+
+def run_workers(
+    queries: List[str],
+    num_workers: Optional[int] = None,
+    db_path: str = DEFAULT_QUEUE_DB,
+    checkpoint_dir: str = DEFAULT_WORKERS_CHECKPOINT_DIR,
+    allow_restart: bool = False,
+):
+    """
+    Encola las consultas en la cola SQLite y las procesa con N procesos worker.
+    Volver a lanzar con el mismo db_path no duplica jobs y retoma los que quedaron sin terminar.
+    """
+    queue = SqliteJobQueue(db_path)
+    job_keys = [request_key(q) for q in queries]
+    added = sum(queue.enqueue(key, q) for key, q in zip(job_keys, queries))
+    logger.info(f"📥 {added} jobs nuevos encolados en {db_path}")
+
+    summary = run_worker_pool(
+        db_path=db_path,
+        services_factory=create_worker_services,
+        num_workers=num_workers,
+        checkpoint_dir=checkpoint_dir,
+        allow_restart=allow_restart,
+    )
+    print("Resumen del pool de workers:")
+    print(summary)
+
+    results = queue.results(job_keys)
+    for key, output in results.items():
+        print(f"\n--- [{key}] ---")
+        print(output)
+    failures = queue.failures(job_keys)
+    if failures:
+        print(f"\n{len(failures)} jobs fallidos:")
+        for key, error in failures.items():
+            print(f"  [{key}] {error}")
+    return results
+
+
 if __name__ == "__main__":
     import sys
 
+    # --allow-restart (modos batch y workers): re-ejecuta desde el inicio las consultas cuyos
+    # checkpoints no permiten recuperar la salida, en lugar de fallar
+    allow_restart = "--allow-restart" in sys.argv
+    argv = [arg for arg in sys.argv if arg != "--allow-restart"]
+
     # Si se pasa 'test' como argumento, ejecutamos las pruebas en streaming
-    if len(sys.argv) > 1 and sys.argv[1] == 'test':
+    if len(argv) > 1 and argv[1] == 'test':
         # Puedes pasar queries adicionales como argumentos siguientes
-        custom_queries = sys.argv[2:] if len(sys.argv) > 2 else None
+        custom_queries = argv[2:] if len(argv) > 2 else None
         asyncio.run(run_server(run_tests=True, test_queries=custom_queries))
+    # Batch reanudable: python -m src.main batch <archivo_consultas.txt> [checkpoint_dir] [--allow-restart]
+    elif len(argv) > 2 and argv[1] == 'batch':
+        with open(argv[2], "r", encoding="utf-8") as f:
+            batch_queries = [line.strip() for line in f if line.strip()]
+        checkpoint_dir = argv[3] if len(argv) > 3 else DEFAULT_CHECKPOINT_DIR
+        asyncio.run(run_batch(batch_queries, checkpoint_dir, allow_restart))
+    # Multi-proceso: python -m src.main workers <archivo_consultas.txt> [num_workers] [jobs.db] [checkpoint_dir] [--allow-restart]
+    elif len(argv) > 2 and argv[1] == 'workers':
+        configure_logging()
+        with open(argv[2], "r", encoding="utf-8") as f:
+            worker_queries = [line.strip() for line in f if line.strip()]
+        num_workers = int(argv[3]) if len(argv) > 3 else None
+        db_path = argv[4] if len(argv) > 4 else DEFAULT_QUEUE_DB
+        checkpoint_dir = argv[5] if len(argv) > 5 else DEFAULT_WORKERS_CHECKPOINT_DIR
+        run_workers(worker_queries, num_workers, db_path, checkpoint_dir, allow_restart)
     else:
         workflow=asyncio.run(run_server())
         serve(entities=[workflow], auto_open=True)
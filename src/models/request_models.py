@@ -1,10 +1,22 @@
-from pydantic import BaseModel
+from typing import Literal
+from pydantic import BaseModel, Field
 
-class RouterOutputModel(BaseModel):
+# Valores válidos de 'tipo'; en el JSON schema del structured output se traduce a un enum
+TipoConsulta = Literal["it", "hr", "other"]
+
+
+class RouterDecisionModel(BaseModel):
+    """
+    Salida mínima del Router Agent: solo 'tipo' y 'confidence'.
+    Se usa en el hot path para no pagar los tokens de 'details'.
+    """
+    tipo: TipoConsulta
+    confidence: float = Field(ge=0, le=1)
+
+
+class RouterOutputModel(RouterDecisionModel):
     """
     Modelo Pydantic que el Router Agent debe devolver.
     campo 'tipo' deberá ser una de: 'it', 'hr', 'other'
     """
-    tipo: str
-    confidence: float | None = None
-    details: str | None = None
\ No newline at end of file
+    details: str | None = None
@@ -0,0 +1,195 @@
+import json
+import logging
+import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Estados posibles de un job en la cola
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_key TEXT NOT NULL UNIQUE,
+    query TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, lease_expires);
+"""
+
+
+@dataclass
+class Job:
+    """Job tomado de la cola por un worker."""
+    id: int
+    job_key: str
+    query: str
+    attempts: int
+
+
+class SqliteJobQueue:
+    """
+    Cola de jobs durable en SQLite compartida entre varios procesos.
+
+    Los workers toman jobs con un lease (tiempo límite). Si un worker muere sin
+    completar su job, el lease expira y otro worker lo vuelve a tomar, hasta
+    max_attempts intentos. Cada operación abre su propia conexión, por lo que la
+    clase se puede usar desde varios procesos e hilos (asyncio.to_thread).
+    """
+
+    def __init__(self, db_path: str, max_attempts: int = 3):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # Modo autocommit: las transacciones explícitas se abren con BEGIN IMMEDIATE
+        conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+        try:
+            conn.execute("PRAGMA busy_timeout=30000")
+            yield conn
+        finally:
+            conn.close()
+
+    # ========== PRODUCTOR ==========
+
+    def enqueue(self, job_key: str, query: str) -> bool:
+        """
+        Encola una consulta. Es idempotente por job_key: devuelve False si ya existía.
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO jobs (job_key, query, status, created_at) VALUES (?, ?, ?, ?)",
+                (job_key, query, PENDING, time.time()),
+            )
+            return cursor.rowcount == 1
+
+    # ========== WORKERS ==========
+
+    def lease(self, worker_id: str, lease_seconds: float) -> Optional[Job]:
+        """
+        Toma el siguiente job pendiente (o con lease vencido) de forma atómica.
+        Devuelve None si no hay nada disponible en este momento.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            # BEGIN IMMEDIATE toma el lock de escritura: dos workers no pueden tomar el mismo job
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Jobs abandonados que ya agotaron sus intentos pasan a 'failed'
+                conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, finished_at = ? "
+                    "WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                    (FAILED, "lease expirado sin completar", now, LEASED, now, self.max_attempts),
+                )
+                row = conn.execute(
+                    "SELECT id, job_key, query, attempts FROM jobs "
+                    "WHERE status = ? OR (status = ? AND lease_expires < ?) "
+                    "ORDER BY id LIMIT 1",
+                    (PENDING, LEASED, now),
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                job_id, job_key, query, attempts = row
+                conn.execute(
+                    "UPDATE jobs SET status = ?, lease_owner = ?, lease_expires = ?, attempts = attempts + 1 "
+                    "WHERE id = ?",
+                    (LEASED, worker_id, now + lease_seconds, job_id),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return Job(id=job_id, job_key=job_key, query=query, attempts=attempts + 1)
+
+    def extend_lease(self, job_id: int, worker_id: str, lease_seconds: float) -> bool:
+        """Renueva el lease de un job en curso. Devuelve False si el worker ya lo perdió."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE id = ? AND status = ? AND lease_owner = ?",
+                (time.time() + lease_seconds, job_id, LEASED, worker_id),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id: int, worker_id: str, result: Any) -> bool:
+        """Marca el job como terminado y guarda el resultado (serializado a JSON)."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = NULL, finished_at = ? "
+                "WHERE id = ? AND status = ? AND lease_owner = ?",
+                (DONE, json.dumps(result, ensure_ascii=False), time.time(), job_id, LEASED, worker_id),
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, job_id: int, worker_id: str, error: str) -> None:
+        """
+        Registra un error. El job vuelve a 'pending' si le quedan intentos,
+        si no queda en 'failed'.
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET "
+                "status = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+                "finished_at = CASE WHEN attempts >= ? THEN ? ELSE NULL END, "
+                "error = ?, lease_owner = NULL, lease_expires = NULL "
+                "WHERE id = ? AND status = ? AND lease_owner = ?",
+                (self.max_attempts, FAILED, PENDING, self.max_attempts, time.time(),
+                 error, job_id, LEASED, worker_id),
+            )
+
+    # ========== COORDINADOR ==========
+
+    def has_unfinished(self) -> bool:
+        """True mientras queden jobs pendientes o en curso."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM jobs WHERE status IN (?, ?) LIMIT 1", (PENDING, LEASED)
+            ).fetchone()
+            return row is not None
+
+    def stats(self) -> Dict[str, int]:
+        """Cantidad de jobs por estado."""
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        with self._connect() as conn:
+            for status, count in conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"):
+                counts[status] = count
+        return counts
+
+    def results(self, job_keys: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Resultados de los jobs terminados, indexados por job_key.
+        Con job_keys se limita a esos jobs (la base puede tener resultados de corridas anteriores).
+        """
+        with self._connect() as conn:
+            rows = conn.execute("SELECT job_key, result FROM jobs WHERE status = ?", (DONE,)).fetchall()
+        results = {job_key: json.loads(result) for job_key, result in rows}
+        if job_keys is None:
+            return results
+        return {key: results[key] for key in job_keys if key in results}
+
+    def failures(self, job_keys: Optional[Iterable[str]] = None) -> Dict[str, str]:
+        """Error registrado de cada job en 'failed', indexado por job_key (filtrable como results)."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT job_key, error FROM jobs WHERE status = ?", (FAILED,)).fetchall()
+        failures = {job_key: error for job_key, error in rows}
+        if job_keys is None:
+            return failures
+        return {key: failures[key] for key in job_keys if key in failures}
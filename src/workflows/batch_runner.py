@@ -0,0 +1,255 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from agent_framework import CheckpointStorage, FileCheckpointStorage, WorkflowCheckpoint, WorkflowOutputEvent
+
+logger = logging.getLogger(__name__)
+
+# Fábrica que recibe el storage de checkpoints de una consulta y devuelve el workflow
+# (normalmente un wrapper de create_support_workflow con los servicios ya creados).
+WorkflowFactory = Callable[[CheckpointStorage], Any]
+
+# Registro append-only: una línea JSON (con fsync) por consulta terminada o fallida
+REGISTRY_FILE = "registry.jsonl"
+
+# Salida final de una consulta, guardada junto a sus checkpoints apenas llega el
+# WorkflowOutputEvent. No debe terminar en .json: FileCheckpointStorage intenta
+# cargar como checkpoint todo *.json de su directorio.
+OUTPUT_FILE = "output.data"
+
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+
+def request_key(query: str) -> str:
+    """
+    Genera una clave estable para una consulta (hash del texto).
+    Se usa cuando el batch se pasa como lista en lugar de un dict {id: consulta}.
+    """
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()[:16]
+
+
+def _write_durable(path: Path, data: str, mode: str = "w") -> None:
+    """Escribe (o agrega) texto y hace fsync para que sobreviva a un crash."""
+    with open(path, mode, encoding="utf-8") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def latest_pending_checkpoint(checkpoints: List[WorkflowCheckpoint]) -> Optional[WorkflowCheckpoint]:
+    """
+    Devuelve el último checkpoint si todavía tiene mensajes pendientes, o None si no
+    hay nada que reanudar.
+    """
+    if not checkpoints:
+        return None
+    latest = max(checkpoints, key=lambda cp: (cp.iteration_count, cp.timestamp))
+    if not any(latest.messages.values()):
+        # El workflow había terminado (o no llegó a encolar nada): no hay desde dónde seguir
+        return None
+    return latest
+
+
+async def collect_output(events, output_path: Optional[Path] = None) -> Any:
+    """
+    Consume un stream de eventos del workflow y devuelve el dato del WorkflowOutputEvent.
+    Si se indica output_path, la salida se persiste en cuanto llega el evento, antes de
+    que el framework escriba el último checkpoint.
+    """
+    final_output = None
+    async for event in events:
+        if isinstance(event, WorkflowOutputEvent):
+            final_output = event.data
+            if output_path is not None:
+                _write_durable(output_path, json.dumps({"output": final_output}, ensure_ascii=False))
+    return final_output
+
+
+def _load_output(output_path: Path) -> Optional[Dict[str, Any]]:
+    if not output_path.exists():
+        return None
+    try:
+        with open(output_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudo leer {output_path}, se ignora: {e}")
+        return None
+
+
+async def run_resumable(
+    workflow_factory: WorkflowFactory,
+    storage_path: Union[str, Path],
+    query: str,
+    key: str = "",
+    allow_restart: bool = False,
+) -> Any:
+    """
+    Ejecuta una consulta con checkpoints en storage_path sin volver a pagar pasos ya hechos:
+
+    - si la salida final ya estaba guardada, se devuelve sin ejecutar nada,
+    - si hay un checkpoint con trabajo pendiente, se reanuda desde ahí,
+    - si no hay checkpoints, se ejecuta desde el inicio.
+
+    Si existen checkpoints pero no permiten recuperar la salida, re-ejecutar implica
+    pagar de nuevo todos los pasos LLM: solo se hace con allow_restart=True, si no se
+    lanza RuntimeError.
+    """
+    storage_path = Path(storage_path)
+    storage = FileCheckpointStorage(storage_path)
+    output_path = storage_path / OUTPUT_FILE
+
+    saved = _load_output(output_path)
+    if saved is not None:
+        logger.info(f"💾 [{key}] salida final ya guardada, no se re-ejecuta")
+        return saved["output"]
+
+    workflow = workflow_factory(storage)
+    checkpoints = await storage.list_checkpoints()
+    if not checkpoints:
+        logger.info(f"▶️ [{key}] ejecutando consulta: {query[:50]}...")
+        return await collect_output(workflow.run_stream(query), output_path)
+
+    checkpoint = latest_pending_checkpoint(checkpoints)
+    if checkpoint is not None:
+        logger.info(
+            f"♻️ [{key}] reanudando desde checkpoint {checkpoint.checkpoint_id} "
+            f"(iteración {checkpoint.iteration_count})"
+        )
+        final_output = await collect_output(
+            workflow.run_stream_from_checkpoint(checkpoint.checkpoint_id, checkpoint_storage=storage),
+            output_path,
+        )
+        if output_path.exists():
+            return final_output
+        reason = "el checkpoint no produjo salida"
+    else:
+        reason = "la ejecución previa terminó sin salida guardada"
+
+    if not allow_restart:
+        raise RuntimeError(
+            f"[{key}] {reason}; re-ejecutar desde el inicio volvería a pagar todos los pasos LLM. "
+            f"Relanzar con --allow-restart (allow_restart=True) o borrar {storage_path} para empezar de cero"
+        )
+
+    logger.warning(f"⚠️ [{key}] {reason}: RE-EJECUCIÓN COMPLETA desde el inicio")
+    # Se descartan los checkpoints viejos para que no se mezclen con los de la nueva ejecución
+    for old in checkpoints:
+        await storage.delete_checkpoint(old.checkpoint_id)
+    return await collect_output(workflow.run_stream(query), output_path)
+
+
+class BatchCheckpointRunner:
+    """
+    Ejecuta un lote de consultas sobre el workflow de soporte con checkpoints en disco.
+
+    Cada consulta usa su propio FileCheckpointStorage (<checkpoint_dir>/<clave>/), de modo
+    que el framework persiste el estado al final de cada superstep: la clasificación viaja
+    en el mensaje pendiente hacia extract_type y el 'it_diagnostic' en el mensaje pendiente
+    hacia it_resolve_executor. Al relanzar el batch:
+
+    - las consultas terminadas según registry.jsonl se saltean (no se vuelve a pagar ningún LLM),
+    - las consultas a medio ejecutar se reanudan desde su último checkpoint, p. ej. una cadena
+      IT interrumpida continúa directamente en it_resolve_executor,
+    - las consultas que fallaron se reintentan; un fallo no frena al resto del batch.
+    """
+
+    def __init__(
+        self,
+        workflow_factory: WorkflowFactory,
+        checkpoint_dir: Union[str, Path],
+        allow_restart: bool = False,
+    ):
+        self._workflow_factory = workflow_factory
+        self._checkpoint_dir = Path(checkpoint_dir)
+        self._checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        self._allow_restart = allow_restart
+        self._registry_path = self._checkpoint_dir / REGISTRY_FILE
+        self._completed: Dict[str, Any] = {}
+        self.failures: Dict[str, str] = {}
+        self._load_registry()
+
+    # ========== REGISTRO DE CONSULTAS ==========
+
+    def _load_registry(self) -> None:
+        """Relee el registro; la última línea de cada clave es la que vale."""
+        if not self._registry_path.exists():
+            return
+        with open(self._registry_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Línea truncada por un crash a mitad de escritura
+                    logger.warning(f"⚠️ Línea inválida en {self._registry_path}, se ignora")
+                    continue
+                key = entry["key"]
+                if entry["status"] == STATUS_DONE:
+                    self._completed[key] = entry["output"]
+                    self.failures.pop(key, None)
+                else:
+                    self.failures[key] = entry["error"]
+
+    def _append_registry(self, entry: Dict[str, Any]) -> None:
+        _write_durable(self._registry_path, json.dumps(entry, ensure_ascii=False) + "\n", mode="a")
+
+    def is_completed(self, key: str) -> bool:
+        return key in self._completed
+
+    async def run_one(self, key: str, query: str) -> Any:
+        """
+        Ejecuta (o reanuda) una consulta y la registra como completada.
+        """
+        if self.is_completed(key):
+            logger.info(f"⏭️ [{key}] ya completada, se omite")
+            return self._completed[key]
+
+        final_output = await run_resumable(
+            self._workflow_factory, self._checkpoint_dir / key, query, key, self._allow_restart
+        )
+
+        self._append_registry({"key": key, "status": STATUS_DONE, "query": query, "output": final_output})
+        self._completed[key] = final_output
+        self.failures.pop(key, None)
+
+        # Los checkpoints intermedios ya no hacen falta: el resultado queda en el registro
+        shutil.rmtree(self._checkpoint_dir / key, ignore_errors=True)
+        return final_output
+
+    async def run_batch(self, requests: Union[Dict[str, str], List[str]]) -> Dict[str, Any]:
+        """
+        Ejecuta un lote de consultas de forma secuencial. Los errores se registran por
+        consulta (ver self.failures) y el batch sigue con la siguiente.
+
+        Args:
+            requests: dict {id: consulta} o lista de consultas (la clave se deriva del texto)
+
+        Returns:
+            dict {id: salida final del workflow} de las consultas completadas
+        """
+        if not isinstance(requests, dict):
+            requests = {request_key(q): q for q in requests}
+
+        pending = sum(1 for k in requests if not self.is_completed(k))
+        logger.info(f"📦 Batch: {len(requests)} consultas, {pending} pendientes")
+
+        results: Dict[str, Any] = {}
+        for key, query in requests.items():
+            try:
+                results[key] = await self.run_one(key, query)
+            except Exception as e:
+                logger.error(f"❌ [{key}] falló, se continúa con la siguiente: {e}")
+                self.failures[key] = str(e)
+                self._append_registry({"key": key, "status": STATUS_FAILED, "query": query, "error": str(e)})
+
+        failed = [k for k in requests if k in self.failures]
+        if failed:
+            logger.warning(f"⚠️ Batch terminado con {len(failed)} consultas fallidas: {failed}")
+        else:
+            logger.info("✅ Batch completado")
+        return results
@@ -0,0 +1,311 @@
+import asyncio
+import contextlib
+import logging
+import multiprocessing
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from src.services.job_queue import DONE, FAILED, LEASED, PENDING, Job, SqliteJobQueue
+from src.workflows.batch_runner import run_resumable
+from src.workflows.workflow_builder import create_support_workflow
+
+logger = logging.getLogger(__name__)
+
+# Fábrica async que cada proceso worker invoca para crear su propio LLMClientWrapper
+# y los servicios (argumentos de create_support_workflow). Debe ser una función de
+# módulo para poder pasarla a los procesos hijos.
+ServicesFactory = Callable[[], Awaitable[Dict[str, Any]]]
+
+# Espera entre reintentos cuando la renovación del lease falla (p. ej. base bloqueada)
+HEARTBEAT_RETRY_SECONDS = 2.0
+
+# Separado del directorio del modo batch: ambos usan la misma clave por consulta
+DEFAULT_WORKERS_CHECKPOINT_DIR = "checkpoints/workers"
+
+LOG_FORMAT = "%(asctime)s %(processName)s %(levelname)s %(message)s"
+
+
+# ========== WORKER (un proceso, un event loop) ==========
+
+def configure_logging() -> None:
+    """
+    Muestra los logs INFO (reporte de throughput, progreso de los workers). Se llama en el
+    proceso coordinador y en cada worker: con 'spawn' los hijos no heredan la configuración.
+    """
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+
+
+async def _renew_lease(
+    queue: SqliteJobQueue,
+    job: Job,
+    worker_id: str,
+    lease_seconds: float,
+    deadline: float,
+) -> Optional[float]:
+    """
+    Renueva el lease reintentando errores transitorios (p. ej. base bloqueada) hasta que
+    el lease actual esté por vencer. Devuelve el nuevo vencimiento, o None si se perdió.
+    """
+    while True:
+        requested_at = time.time()
+        try:
+            if await asyncio.to_thread(queue.extend_lease, job.id, worker_id, lease_seconds):
+                return requested_at + lease_seconds
+            logger.warning(f"⚠️ [{worker_id}] el job {job.job_key} fue tomado por otro worker")
+            return None
+        except Exception as e:
+            if time.time() + HEARTBEAT_RETRY_SECONDS >= deadline:
+                logger.error(f"❌ [{worker_id}] no se pudo renovar el lease de {job.job_key} a tiempo: {e}")
+                return None
+            logger.warning(f"⚠️ [{worker_id}] error renovando lease de {job.job_key}, se reintenta: {e}")
+            await asyncio.sleep(HEARTBEAT_RETRY_SECONDS)
+
+
+async def _run_job(
+    queue: SqliteJobQueue,
+    job: Job,
+    worker_id: str,
+    services: Dict[str, Any],
+    checkpoint_dir: Path,
+    lease_seconds: float,
+    allow_restart: bool = False,
+) -> None:
+    """
+    Ejecuta un job renovando su lease mientras dura. Los checkpoints se guardan en
+    <checkpoint_dir>/<job_key>/, así que si otro worker retoma el job tras un crash
+    continúa desde el último paso completado.
+
+    Si el lease se pierde (otro worker ya lo tomó, o no se pudo renovar antes de que
+    venciera) se cancela la ejecución: seguir pagando LLM no tiene sentido y dos
+    ejecuciones del mismo job pisarían el mismo directorio de checkpoints.
+    """
+    storage_path = checkpoint_dir / job.job_key
+    run_task = asyncio.create_task(
+        run_resumable(
+            lambda storage: create_support_workflow(**services, checkpoint_storage=storage),
+            storage_path,
+            job.query,
+            job.job_key,
+            allow_restart,
+        )
+    )
+    lease_lost = False
+
+    async def heartbeat() -> None:
+        nonlocal lease_lost
+        deadline = time.time() + lease_seconds
+        while True:
+            await asyncio.sleep(lease_seconds / 3)
+            new_deadline = await _renew_lease(queue, job, worker_id, lease_seconds, deadline)
+            if new_deadline is None:
+                lease_lost = True
+                run_task.cancel()
+                return
+            deadline = new_deadline
+
+    heartbeat_task = asyncio.create_task(heartbeat())
+    try:
+        output = await run_task
+    except asyncio.CancelledError:
+        if not lease_lost:
+            raise
+        logger.warning(f"🛑 [{worker_id}] lease perdido, se abandona el job {job.job_key}")
+        return
+    except Exception as e:
+        logger.error(f"❌ [{worker_id}] error en job {job.job_key} (intento {job.attempts}): {e}")
+        await asyncio.to_thread(queue.fail, job.id, worker_id, str(e))
+        return
+    finally:
+        heartbeat_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await heartbeat_task
+
+    if await asyncio.to_thread(queue.complete, job.id, worker_id, output):
+        shutil.rmtree(storage_path, ignore_errors=True)
+    else:
+        logger.warning(f"⚠️ [{worker_id}] el job {job.job_key} ya no le pertenece, se descarta el resultado")
+
+
+async def _worker_loop(
+    db_path: str,
+    worker_id: str,
+    services_factory: ServicesFactory,
+    checkpoint_dir: str,
+    concurrency: int,
+    lease_seconds: float,
+    poll_interval: float,
+    allow_restart: bool = False,
+) -> None:
+    queue = SqliteJobQueue(db_path)
+    services = await services_factory()
+    checkpoint_path = Path(checkpoint_dir)
+    logger.info(f"👷 [{worker_id}] listo con {concurrency} slots")
+
+    async def slot(slot_index: int) -> None:
+        slot_id = f"{worker_id}-{slot_index}"
+        while True:
+            job = await asyncio.to_thread(queue.lease, slot_id, lease_seconds)
+            if job is None:
+                # Sin trabajo disponible: salimos solo cuando no queda nada pendiente ni en curso
+                # (un lease en curso puede vencer y necesitar reintento).
+                if not await asyncio.to_thread(queue.has_unfinished):
+                    return
+                await asyncio.sleep(poll_interval)
+                continue
+            await _run_job(queue, job, slot_id, services, checkpoint_path, lease_seconds, allow_restart)
+
+    await asyncio.gather(*(slot(i) for i in range(concurrency)))
+    logger.info(f"🏁 [{worker_id}] cola vacía, worker terminado")
+
+
+def worker_process_main(
+    db_path: str,
+    worker_index: int,
+    services_factory: ServicesFactory,
+    checkpoint_dir: str,
+    concurrency: int,
+    lease_seconds: float,
+    poll_interval: float,
+    allow_restart: bool = False,
+) -> None:
+    """Punto de entrada de cada proceso worker."""
+    configure_logging()
+    worker_id = f"worker{worker_index}-{os.getpid()}"
+    asyncio.run(
+        _worker_loop(
+            db_path, worker_id, services_factory, checkpoint_dir, concurrency, lease_seconds, poll_interval,
+            allow_restart,
+        )
+    )
+
+
+# ========== COORDINADOR ==========
+
+def run_worker_pool(
+    db_path: str,
+    services_factory: ServicesFactory,
+    num_workers: Optional[int] = None,
+    concurrency: int = 4,
+    checkpoint_dir: str = DEFAULT_WORKERS_CHECKPOINT_DIR,
+    lease_seconds: float = 120.0,
+    poll_interval: float = 1.0,
+    report_interval: float = 10.0,
+    max_restarts: int = 3,
+    restart_backoff: float = 5.0,
+    allow_restart: bool = False,
+) -> Dict[str, Any]:
+    """
+    Lanza N procesos worker sobre la cola SQLite y reporta el throughput agregado
+    hasta que no quedan jobs pendientes.
+
+    Args:
+        db_path: Ruta de la base SQLite de la cola (los jobs se encolan antes con SqliteJobQueue.enqueue)
+        services_factory: Función async que crea los servicios del workflow en cada proceso
+        num_workers: Cantidad de procesos (por defecto, un proceso por core)
+        concurrency: Jobs simultáneos por proceso (tareas sobre el mismo event loop)
+        checkpoint_dir: Directorio de checkpoints por job (no compartir con el modo batch)
+        lease_seconds: Duración del lease; un worker caído libera sus jobs al vencer
+        poll_interval: Espera entre intentos cuando la cola no tiene jobs disponibles
+        report_interval: Cada cuántos segundos se loguea el throughput
+        max_restarts: Relanzamientos permitidos por worker caído antes de abortar el pool
+        restart_backoff: Espera antes del primer relanzamiento; se duplica en cada fallo
+        allow_restart: Permite re-ejecutar desde el inicio un job cuyos checkpoints no
+            permiten recuperar la salida (vuelve a pagar todos los pasos LLM)
+
+    Returns:
+        Estadísticas finales: jobs por estado, duración y throughput (jobs/s)
+
+    Raises:
+        RuntimeError: Si un worker se cae más de max_restarts veces (p. ej. configuración
+            inválida). Los jobs sin terminar quedan en la cola para un próximo intento.
+    """
+    num_workers = num_workers or os.cpu_count() or 1
+    queue = SqliteJobQueue(db_path)
+    # 'spawn' evita heredar event loops / clientes HTTP del proceso padre
+    mp_context = multiprocessing.get_context("spawn")
+
+    def start_worker(index: int) -> multiprocessing.Process:
+        process = mp_context.Process(
+            target=worker_process_main,
+            args=(
+                db_path, index, services_factory, checkpoint_dir, concurrency, lease_seconds, poll_interval,
+                allow_restart,
+            ),
+            name=f"worker{index}",
+        )
+        process.start()
+        return process
+
+    def stop_all() -> None:
+        for w in workers:
+            if w.is_alive():
+                w.terminate()
+        for w in workers:
+            w.join()
+
+    logger.info(f"🚀 Lanzando {num_workers} workers x {concurrency} slots sobre {db_path}")
+    workers: List[multiprocessing.Process] = [start_worker(i) for i in range(num_workers)]
+    restarts = [0] * num_workers
+    # Workers caídos esperando su relanzamiento: índice -> momento del relanzamiento
+    restart_at: Dict[int, float] = {}
+
+    start_time = time.time()
+    start_done = queue.stats()[DONE]
+    last_time, last_done = start_time, start_done
+
+    while any(w.is_alive() for w in workers) or restart_at:
+        alive = [w for w in workers if w.is_alive()]
+        if alive:
+            for w in alive:
+                w.join(timeout=report_interval / len(alive))
+        else:
+            time.sleep(max(0.0, min(report_interval, min(restart_at.values()) - time.time())))
+
+        # Workers caídos: se relanzan con backoff exponencial, sus jobs se recuperan al vencer el lease
+        now = time.time()
+        for i, w in enumerate(workers):
+            if w.is_alive() or w.exitcode in (0, None) or i in restart_at:
+                continue
+            restarts[i] += 1
+            if restarts[i] > max_restarts:
+                stop_all()
+                raise RuntimeError(
+                    f"{w.name} terminó con código {w.exitcode} {restarts[i]} veces; se aborta el pool. "
+                    f"Los jobs sin terminar quedan en {db_path}"
+                )
+            delay = restart_backoff * 2 ** (restarts[i] - 1)
+            logger.warning(
+                f"⚠️ {w.name} terminó con código {w.exitcode}, se relanza en {delay:.0f}s "
+                f"({restarts[i]}/{max_restarts})"
+            )
+            restart_at[i] = now + delay
+
+        for i, when in list(restart_at.items()):
+            if when > now:
+                continue
+            del restart_at[i]
+            if queue.has_unfinished():
+                workers[i] = start_worker(i)
+
+        stats = queue.stats()
+        window = stats[DONE] - last_done
+        logger.info(
+            f"📈 done={stats[DONE]} failed={stats[FAILED]} leased={stats[LEASED]} pending={stats[PENDING]} | "
+            f"{window / max(now - last_time, 1e-9):.2f} jobs/s (ventana), "
+            f"{(stats[DONE] - start_done) / max(now - start_time, 1e-9):.2f} jobs/s (total)"
+        )
+        last_time, last_done = now, stats[DONE]
+
+    elapsed = time.time() - start_time
+    stats = queue.stats()
+    summary = {
+        **stats,
+        "workers": num_workers,
+        "elapsed_seconds": elapsed,
+        "throughput": (stats[DONE] - start_done) / max(elapsed, 1e-9),
+    }
+    logger.info(f"✅ Pool terminado: {summary}")
+    return summary
@@ -1,7 +1,7 @@
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 from typing_extensions import Never
-from agent_framework import WorkflowBuilder, Case, Default, WorkflowViz, WorkflowContext, executor
+from agent_framework import WorkflowBuilder, Case, Default, WorkflowViz, WorkflowContext, executor, CheckpointStorage
 from src.models.request_models import RouterOutputModel
 
 import json  # Add this import for optional JSON formatting if you want to include metadata
@@ -188,20 +188,29 @@ def create_workflow_executors(
     }
 
 
-def build_support_workflow(executors: Dict[str, Any]):
+def build_support_workflow(
+    executors: Dict[str, Any],
+    checkpoint_storage: Optional[CheckpointStorage] = None,
+):
     """
     Construye el workflow usando los executors creados.
     
     Args:
         executors: Diccionario con todos los executors del workflow
+        checkpoint_storage: Si se indica, el workflow guarda un checkpoint al final
+            de cada superstep (clasificación, diagnóstico IT, etc.)
         
     Returns:
         Workflow construido y listo para ejecutar
     """
     logger.info("🏗️ Construyendo workflow con branching logic...")
     
+    builder = WorkflowBuilder()
+    if checkpoint_storage is not None:
+        builder = builder.with_checkpointing(checkpoint_storage)
+    
     workflow = (
-        WorkflowBuilder()
+        builder
         # Nodo inicial
         .set_start_executor(executors["store_user_input"])
         
@@ -340,6 +349,7 @@ def create_support_workflow(
     it_resolve_service,
     hr_service,
     visualize: bool = False,
+    checkpoint_storage: Optional[CheckpointStorage] = None,
 ):
     """
     Factory function para crear el workflow de soporte completo.
@@ -350,6 +360,8 @@ def create_support_workflow(
         it_resolve_service: Servicio de resolución IT
         hr_service: Servicio de RRHH
         visualize: Si True, genera y guarda visualizaciones del workflow
+        checkpoint_storage: Storage de checkpoints del framework (ej. FileCheckpointStorage).
+            Permite reanudar una ejecución interrumpida sin repetir los pasos ya completados.
     
     Returns:
         Workflow configurado y listo para ejecutar
@@ -373,7 +385,7 @@ def create_support_workflow(
     )
     
     # Construir el workflow
-    workflow = build_support_workflow(executors)
+    workflow = build_support_workflow(executors, checkpoint_storage=checkpoint_storage)
     
     # Generar visualizaciones si se solicita
     if visualize:
@@ -0,0 +1,167 @@
+import asyncio
+import json
+
+import pytest
+from agent_framework import FileCheckpointStorage, WorkflowCheckpoint
+
+from src.models.request_models import RouterOutputModel
+from src.workflows.batch_runner import (
+    OUTPUT_FILE,
+    REGISTRY_FILE,
+    BatchCheckpointRunner,
+    latest_pending_checkpoint,
+    run_resumable,
+)
+from src.workflows.workflow_builder import create_support_workflow
+
+
+def checkpoint(iteration: int, pending: bool) -> WorkflowCheckpoint:
+    messages = {"it_diagnose_executor": [{"data": "ctx"}]} if pending else {}
+    return WorkflowCheckpoint(iteration_count=iteration, messages=messages)
+
+
+def save_checkpoints(path, *checkpoints):
+    storage = FileCheckpointStorage(path)
+    for cp in checkpoints:
+        asyncio.run(storage.save_checkpoint(cp))
+
+
+def unexpected_factory(storage):
+    raise AssertionError("no se debería construir el workflow")
+
+
+class SilentWorkflow:
+    """Workflow falso que al reanudar no emite ningún WorkflowOutputEvent."""
+
+    async def run_stream_from_checkpoint(self, checkpoint_id, checkpoint_storage=None):
+        return
+        yield
+
+    async def run_stream(self, message):
+        raise AssertionError("no se debería re-ejecutar desde el inicio")
+        yield
+
+
+# ========== latest_pending_checkpoint ==========
+
+def test_latest_pending_checkpoint_empty():
+    assert latest_pending_checkpoint([]) is None
+
+
+def test_latest_pending_checkpoint_without_pending_messages():
+    assert latest_pending_checkpoint([checkpoint(1, pending=True), checkpoint(2, pending=False)]) is None
+
+
+def test_latest_pending_checkpoint_picks_highest_iteration():
+    latest = checkpoint(3, pending=True)
+    assert latest_pending_checkpoint([checkpoint(1, pending=True), latest]) is latest
+
+
+# ========== registro ==========
+
+def write_registry(tmp_path, *lines):
+    (tmp_path / REGISTRY_FILE).write_text("".join(lines), encoding="utf-8")
+
+
+def test_registry_ignores_truncated_last_line(tmp_path):
+    write_registry(
+        tmp_path,
+        json.dumps({"key": "a", "status": "done", "query": "qa", "output": "ra"}) + "\n",
+        '{"key": "b", "status": "do',
+    )
+
+    runner = BatchCheckpointRunner(unexpected_factory, tmp_path)
+
+    assert runner.is_completed("a")
+    assert not runner.is_completed("b")
+
+
+def test_registry_done_after_failed_wins(tmp_path):
+    write_registry(
+        tmp_path,
+        json.dumps({"key": "a", "status": "failed", "query": "qa", "error": "boom"}) + "\n",
+        json.dumps({"key": "a", "status": "done", "query": "qa", "output": "ra"}) + "\n",
+    )
+
+    runner = BatchCheckpointRunner(unexpected_factory, tmp_path)
+
+    assert runner.is_completed("a")
+    assert runner.failures == {}
+    assert asyncio.run(runner.run_batch({"a": "qa"})) == {"a": "ra"}
+
+
+# ========== run_resumable ==========
+
+def test_run_resumable_returns_saved_output_without_building_workflow(tmp_path):
+    tmp_path.joinpath(OUTPUT_FILE).write_text(json.dumps({"output": "guardada"}), encoding="utf-8")
+
+    assert asyncio.run(run_resumable(unexpected_factory, tmp_path, "consulta")) == "guardada"
+
+
+def test_run_resumable_refuses_restart_when_checkpoint_yields_nothing(tmp_path):
+    save_checkpoints(tmp_path, checkpoint(2, pending=True))
+
+    with pytest.raises(RuntimeError, match="--allow-restart"):
+        asyncio.run(run_resumable(lambda storage: SilentWorkflow(), tmp_path, "consulta"))
+
+
+def test_run_resumable_refuses_restart_when_finished_without_output(tmp_path):
+    save_checkpoints(tmp_path, checkpoint(4, pending=False))
+
+    with pytest.raises(RuntimeError, match="sin salida guardada"):
+        asyncio.run(run_resumable(lambda storage: SilentWorkflow(), tmp_path, "consulta"))
+
+
+# ========== workflow real con servicios stub ==========
+
+class CountingServices:
+    """Servicios falsos que cuentan las llamadas; resolve falla la primera vez."""
+
+    def __init__(self):
+        self.calls = {"classify": 0, "diagnose": 0, "resolve": 0}
+        self.resolve_fails = True
+
+    async def classify(self, user_input):
+        self.calls["classify"] += 1
+        return RouterOutputModel(tipo="it", confidence=0.9)
+
+    async def diagnose(self, user_input):
+        self.calls["diagnose"] += 1
+        return "diagnóstico"
+
+    async def resolve(self, diagnostic, user_input):
+        self.calls["resolve"] += 1
+        if self.resolve_fails:
+            raise RuntimeError("resolve caído")
+        return f"solución para {diagnostic}"
+
+    async def handle(self, user_input):
+        return "rrhh"
+
+    def workflow_factory(self, storage):
+        return create_support_workflow(
+            router_service=self,
+            it_diagnose_service=self,
+            it_resolve_service=self,
+            hr_service=self,
+            checkpoint_storage=storage,
+        )
+
+
+def test_batch_resumes_it_chain_at_resolve(tmp_path):
+    services = CountingServices()
+    query = "Error 500 en el servidor"
+
+    runner = BatchCheckpointRunner(services.workflow_factory, tmp_path)
+    assert asyncio.run(runner.run_batch([query])) == {}
+    assert len(runner.failures) == 1
+
+    services.resolve_fails = False
+    runner = BatchCheckpointRunner(services.workflow_factory, tmp_path)
+    assert list(asyncio.run(runner.run_batch([query])).values()) == ["solución para diagnóstico"]
+    assert services.calls == {"classify": 1, "diagnose": 1, "resolve": 2}
+
+    # Tercera corrida: ya está en el registro, no se llama a ningún servicio
+    runner = BatchCheckpointRunner(services.workflow_factory, tmp_path)
+    asyncio.run(runner.run_batch([query]))
+    assert services.calls == {"classify": 1, "diagnose": 1, "resolve": 2}
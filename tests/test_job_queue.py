@@ -0,0 +1,88 @@
+import time
+
+import pytest
+
+from src.services.job_queue import DONE, FAILED, LEASED, PENDING, SqliteJobQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return SqliteJobQueue(str(tmp_path / "jobs.db"), max_attempts=2)
+
+
+def test_enqueue_is_idempotent_by_key(queue):
+    assert queue.enqueue("a", "consulta a") is True
+    assert queue.enqueue("a", "consulta a") is False
+    assert queue.stats()[PENDING] == 1
+
+
+def test_lease_is_exclusive(queue):
+    queue.enqueue("a", "consulta a")
+    job = queue.lease("w1", lease_seconds=60)
+    assert job is not None and job.job_key == "a" and job.attempts == 1
+    assert queue.lease("w2", lease_seconds=60) is None
+    assert queue.stats()[LEASED] == 1
+
+
+def test_expired_lease_is_released_to_another_worker(queue):
+    queue.enqueue("a", "consulta a")
+    first = queue.lease("w1", lease_seconds=0.05)
+    time.sleep(0.1)
+    second = queue.lease("w2", lease_seconds=60)
+    assert second is not None and second.id == first.id
+    assert second.attempts == 2
+
+
+def test_stale_complete_is_rejected(queue):
+    queue.enqueue("a", "consulta a")
+    stale = queue.lease("w1", lease_seconds=0.05)
+    time.sleep(0.1)
+    current = queue.lease("w2", lease_seconds=60)
+
+    assert queue.extend_lease(stale.id, "w1", 60) is False
+    assert queue.complete(stale.id, "w1", "resultado viejo") is False
+    assert queue.complete(current.id, "w2", "resultado") is True
+    assert queue.results() == {"a": "resultado"}
+
+
+def test_fail_retries_until_attempts_exhausted(queue):
+    queue.enqueue("a", "consulta a")
+    job = queue.lease("w1", lease_seconds=60)
+    queue.fail(job.id, "w1", "boom")
+    assert queue.stats()[PENDING] == 1
+
+    job = queue.lease("w1", lease_seconds=60)
+    queue.fail(job.id, "w1", "boom")
+    assert queue.stats()[FAILED] == 1
+    assert queue.has_unfinished() is False
+
+
+def test_abandoned_job_fails_after_max_attempts(queue):
+    queue.enqueue("a", "consulta a")
+    queue.lease("w1", lease_seconds=0.05)
+    time.sleep(0.1)
+    queue.lease("w2", lease_seconds=0.05)
+    time.sleep(0.1)
+
+    assert queue.lease("w3", lease_seconds=60) is None
+    assert queue.stats()[FAILED] == 1
+
+
+def test_results_filtered_by_keys(queue):
+    for key in ("a", "b"):
+        queue.enqueue(key, f"consulta {key}")
+        job = queue.lease("w1", lease_seconds=60)
+        queue.complete(job.id, "w1", key.upper())
+
+    assert queue.stats()[DONE] == 2
+    assert queue.results(["b", "c"]) == {"b": "B"}
+
+
+def test_failures_filtered_by_keys(queue):
+    queue.enqueue("a", "consulta a")
+    for _ in range(2):
+        job = queue.lease("w1", lease_seconds=60)
+        queue.fail(job.id, "w1", "boom")
+
+    assert queue.failures() == {"a": "boom"}
+    assert queue.failures(["b"]) == {}
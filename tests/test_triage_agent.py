@@ -0,0 +1,83 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.agents.triage_agent import RouterAgentService, extract_json_payload
+from src.models.request_models import RouterDecisionModel, RouterOutputModel
+
+
+class StubAgent:
+    """ChatAgent mínimo: devuelve una respuesta fija y guarda los kwargs de run()."""
+
+    def __init__(self, text: str, value=None):
+        self._response = SimpleNamespace(text=text, value=value)
+        self.calls = []
+
+    async def run(self, prompt, **kwargs):
+        self.calls.append(kwargs)
+        return self._response
+
+
+def classify(agent, user_input="No puedo entrar al servidor", **kwargs):
+    return asyncio.run(RouterAgentService(agent, **kwargs).classify(user_input))
+
+
+def test_uses_structured_output_value():
+    value = RouterOutputModel(tipo="hr", confidence=0.9, details="vacaciones")
+    agent = StubAgent(text="texto que no se parsea", value=value)
+
+    result = classify(agent)
+
+    assert result == value
+    assert agent.calls[0]["response_format"] is RouterOutputModel
+
+
+def test_parses_fenced_json():
+    agent = StubAgent('Claro:\n```json\n{"tipo": "hr", "confidence": 0.8, "details": "permiso"}\n```')
+
+    result = classify(agent)
+
+    assert (result.tipo, result.confidence, result.details) == ("hr", 0.8, "permiso")
+
+
+def test_parses_json_with_surrounding_text():
+    agent = StubAgent('La clasificación es {"tipo": "other", "confidence": 0.7} según el mensaje.')
+
+    result = classify(agent)
+
+    assert (result.tipo, result.confidence) == ("other", 0.7)
+
+
+@pytest.mark.parametrize("text", [
+    '{"tipo": "finanzas", "confidence": 0.9}',
+    '{"tipo": "it"}',
+    "sin JSON",
+])
+def test_invalid_output_falls_back_to_heuristic(text):
+    result = classify(StubAgent(text), user_input="Tengo un error en el login")
+
+    assert (result.tipo, result.confidence, result.details) == ("it", 0.5, "heuristic fallback")
+
+
+def test_without_details_requests_lean_schema_and_drops_details():
+    agent = StubAgent('{"tipo": "it", "confidence": 0.95, "details": "no pedido"}')
+
+    result = classify(agent, include_details=False)
+
+    assert agent.calls[0]["response_format"] is RouterDecisionModel
+    assert (result.tipo, result.confidence, result.details) == ("it", 0.95, None)
+
+
+def test_without_details_accepts_decision_value():
+    agent = StubAgent("", value=RouterDecisionModel(tipo="hr", confidence=0.6))
+
+    result = classify(agent, include_details=False)
+
+    assert isinstance(result, RouterOutputModel)
+    assert (result.tipo, result.confidence, result.details) == ("hr", 0.6, None)
+
+
+def test_extract_json_payload_ignores_non_objects():
+    assert extract_json_payload("[1, 2, 3]") is None
+    assert extract_json_payload("") is None
@@ -0,0 +1,114 @@
+import asyncio
+import sqlite3
+import time
+
+import pytest
+
+from src.services.job_queue import Job, SqliteJobQueue
+from src.workflows import worker_pool
+
+
+class FakeQueue:
+    """Cola falsa: extend_lease devuelve (o lanza) lo que se configure y registra las llamadas."""
+
+    def __init__(self, extend_results):
+        self._extend_results = list(extend_results)
+        self.extend_calls = 0
+        self.completed = []
+        self.failed = []
+
+    def extend_lease(self, job_id, worker_id, lease_seconds):
+        self.extend_calls += 1
+        result = self._extend_results[min(self.extend_calls, len(self._extend_results)) - 1]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def complete(self, job_id, worker_id, result):
+        self.completed.append(result)
+        return True
+
+    def fail(self, job_id, worker_id, error):
+        self.failed.append(error)
+
+
+JOB = Job(id=1, job_key="k", query="consulta", attempts=1)
+
+
+async def failing_services_factory():
+    """Simula una configuración inválida: el worker muere al arrancar."""
+    raise RuntimeError("configuración de Azure inválida")
+
+
+def test_run_job_cancels_run_when_lease_is_lost(monkeypatch, tmp_path):
+    cancelled = asyncio.Event()
+
+    async def slow_run(*args, **kwargs):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    monkeypatch.setattr(worker_pool, "run_resumable", slow_run)
+    queue = FakeQueue([False])
+
+    async def scenario():
+        await asyncio.wait_for(worker_pool._run_job(queue, JOB, "w1", {}, tmp_path, lease_seconds=0.06), 2)
+        return cancelled.is_set()
+
+    assert asyncio.run(scenario()) is True
+    assert queue.completed == [] and queue.failed == []
+
+
+def test_run_job_completes_when_lease_is_kept(monkeypatch, tmp_path):
+    async def quick_run(*args, **kwargs):
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    monkeypatch.setattr(worker_pool, "run_resumable", quick_run)
+    queue = FakeQueue([True])
+
+    asyncio.run(worker_pool._run_job(queue, JOB, "w1", {}, tmp_path, lease_seconds=0.03))
+
+    assert queue.completed == ["ok"] and queue.failed == []
+
+
+def test_renew_lease_retries_transient_errors(monkeypatch):
+    monkeypatch.setattr(worker_pool, "HEARTBEAT_RETRY_SECONDS", 0.01)
+    queue = FakeQueue([sqlite3.OperationalError("database is locked"), True])
+
+    new_deadline = asyncio.run(worker_pool._renew_lease(queue, JOB, "w1", 60, time.time() + 1))
+
+    assert queue.extend_calls == 2
+    assert new_deadline is not None and new_deadline > time.time() + 50
+
+
+def test_renew_lease_gives_up_at_deadline(monkeypatch):
+    monkeypatch.setattr(worker_pool, "HEARTBEAT_RETRY_SECONDS", 0.01)
+    queue = FakeQueue([sqlite3.OperationalError("database is locked")])
+
+    start = time.time()
+    assert asyncio.run(worker_pool._renew_lease(queue, JOB, "w1", 60, start + 0.1)) is None
+
+    assert queue.extend_calls > 2
+    assert time.time() - start < 1
+
+
+def test_pool_aborts_after_max_restarts(tmp_path):
+    db_path = str(tmp_path / "jobs.db")
+    SqliteJobQueue(db_path).enqueue("k", "consulta")
+
+    with pytest.raises(RuntimeError, match="se aborta el pool"):
+        worker_pool.run_worker_pool(
+            db_path,
+            failing_services_factory,
+            num_workers=1,
+            checkpoint_dir=str(tmp_path / "checkpoints"),
+            report_interval=0.2,
+            max_restarts=1,
+            restart_backoff=0.01,
+        )
+
+    # Los jobs quedan en la cola para un próximo intento
+    assert SqliteJobQueue(db_path).has_unfinished()